@@ -7,6 +7,9 @@ Python script that provides some stats about Nginx logs stored in MongoDB
 from pymongo import MongoClient
 
 
+METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+
+
 def log_stats():
     """
     provides some stats about Nginx logs stored in MongoDB
@@ -14,21 +17,39 @@ def log_stats():
     client = MongoClient()
     db = client.logs
     collection = db.nginx
-    
-    # Get the total number of logs
-    total_logs = collection.count_documents({})
+
+    # Let the method/path lookups walk an index instead of the collection
+    collection.create_index([("method", 1), ("path", 1)])
+
+    # Get the total number of logs from the collection metadata
+    total_logs = collection.estimated_document_count()
+
+    # Count the filtered logs in a single pass over the collection
+    counters = {}
+    for method in METHODS:
+        counters[method] = {
+            "$sum": {"$cond": [{"$eq": ["$method", method]}, 1, 0]}
+        }
+    counters["status_check"] = {
+        "$sum": {"$cond": [{"$and": [{"$eq": ["$method", "GET"]},
+                                     {"$eq": ["$path", "/status"]}]}, 1, 0]}
+    }
+    pipeline = [
+        {"$match": {"method": {"$in": METHODS}}},
+        {"$group": {"_id": None, **counters}},
+    ]
+    stats = next(collection.aggregate(pipeline), {})
+
     print(f"{total_logs} logs")
-    
+
     # Print the methods count
     print("Methods:")
-    methods = ["GET", "POST", "PUT", "PATCH", "DELETE"]
-    for method in methods:
-        count = collection.count_documents({"method": method})
-        print(f"\tmethod {method}: {count}")
-    
+    for method in METHODS:
+        print(f"\tmethod {method}: {stats.get(method, 0)}")
+
     # Count status check logs
-    status_check_count = collection.count_documents({"method": "GET", "path": "/status"})
-    print(f"{status_check_count} status check")
+    print(f"{stats.get('status_check', 0)} status check")
+
 
 if __name__ == "__main__":
     log_stats()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
 a Python function that inserts a new document in a collection based on kwargs
+and a bulk variant that inserts several documents at once
 """
 
 
@@ -8,5 +9,14 @@ def insert_school(mongo_collection, **kwargs):
     """
     inserts a new document in a collection
     """
-    new_docs = mongo_collection.insert_one(kwargs)
-    return new_docs.inserted_id
+    return mongo_collection.insert_one(kwargs).inserted_id
+
+
+def insert_schools(mongo_collection, docs):
+    """
+    inserts several new documents in a collection with one bulk write
+    """
+    docs = list(docs)
+    if not docs:
+        return []
+    return mongo_collection.insert_many(docs, ordered=False).inserted_ids
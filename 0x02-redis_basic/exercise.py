@@ -6,16 +6,85 @@ counting how many times methods are called,
 and keeping a history of inputs and outputs.
 """
 
+import os
+import msgpack
 import redis
-import uuid
-from typing import Union, Callable, Optional
+from typing import Union, Callable, Iterable, Iterator, List, Optional
 from functools import wraps
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Connection pool shared by every Redis client of this module; callers
+# wait for a free connection once all 64 are in use
+_POOL = redis.BlockingConnectionPool(host="localhost", port=6379,
+                                    max_connections=64, timeout=10)
+
+# Cache instance and pipeline of the decorated call running in this context
+_CURRENT_BATCH: ContextVar = ContextVar("_CURRENT_BATCH", default=None)
+
+
+def _pack(value) -> bytes:
+    """
+    Serialize a history entry with msgpack.
+
+    Values msgpack cannot encode, such as integers outside the 64-bit
+    range, are stored as their ``str()`` form instead.
+    """
+    try:
+        return msgpack.packb(value, use_bin_type=True)
+    except (TypeError, ValueError, OverflowError):
+        return msgpack.packb(str(value), use_bin_type=True)
+
+
+def _unpack(data: bytes):
+    """
+    Deserialize a history entry written by ``_pack``.
+
+    Entries written before the msgpack format are plain ``str()``
+    output and are returned as decoded strings.
+    """
+    try:
+        return msgpack.unpackb(data, raw=False)
+    except (ValueError, msgpack.UnpackException):
+        return data.decode("utf-8")
+
+
+@contextmanager
+def _batch(cache) -> Iterator[redis.client.Pipeline]:
+    """
+    Yield the pipeline shared by the decorators of the current call.
+
+    The outermost decorator opens the pipeline and sends every queued
+    command in a single round trip once the decorated method returns;
+    inner decorators append their commands to the same pipeline. The
+    pipeline is tracked per thread and per asyncio task, so concurrent
+    calls on the same instance never share it.
+
+    Parameters
+    ----------
+    cache : Cache
+        The instance whose Redis client runs the pipeline.
+    """
+    current = _CURRENT_BATCH.get()
+    if current is not None and current[0] is cache:
+        yield current[1]
+        return
+    pipe = cache._redis.pipeline(transaction=False)
+    token = _CURRENT_BATCH.set((cache, pipe))
+    try:
+        yield pipe
+    finally:
+        _CURRENT_BATCH.reset(token)
+        pipe.execute()
 
 
 def count_calls(method: Callable) -> Callable:
     """
     Decorator that counts how many times a method is called.
 
+    The Redis key of the counter is exposed as ``count_key`` on the
+    decorated method.
+
     Parameters
     ----------
     method : Callable
@@ -26,12 +95,15 @@ def count_calls(method: Callable) -> Callable:
     Callable
         The decorated method.
     """
+    key = method.__qualname__.encode()
+
     @wraps(method)
     def wrapper(self, *args, **kwargs):
         """Wrapper function that increments the call count in Redis."""
-        key = method.__qualname__
-        self._redis.incr(key)
-        return method(self, *args, **kwargs)
+        with _batch(self) as pipe:
+            pipe.incr(key)
+            return method(self, *args, **kwargs)
+    wrapper.count_key = key
     return wrapper
 
 
@@ -40,6 +112,12 @@ def call_history(method: Callable) -> Callable:
     Decorator that stores the history of inputs and
     outputs for a particular function.
 
+    Inputs and outputs are serialized with msgpack, which keeps the
+    entries compact and lets ``replay`` restore the original values;
+    anything msgpack cannot encode falls back to its ``str()`` form.
+    The Redis keys of the history lists are exposed as ``input_key`` and
+    ``output_key`` on the decorated method.
+
     Parameters
     ----------
     method : Callable
@@ -50,18 +128,22 @@ def call_history(method: Callable) -> Callable:
     Callable
         The decorated method.
     """
+    input_key = f"{method.__qualname__}:inputs".encode()
+    output_key = f"{method.__qualname__}:outputs".encode()
+
     @wraps(method)
     def wrapper(self, *args, **kwargs):
         """Wrapper function that stores the input arguments
         and output of the method in Redis."""
-        input_key = f"{method.__qualname__}:inputs"
-        output_key = f"{method.__qualname__}:outputs"
-
-        self._redis.rpush(input_key, str(args))
-        result = method(self, *args, **kwargs)
-        self._redis.rpush(output_key, str(result))
+        packed_args = _pack(args)
+        with _batch(self) as pipe:
+            pipe.rpush(input_key, packed_args)
+            result = method(self, *args, **kwargs)
+            pipe.rpush(output_key, _pack(result))
 
         return result
+    wrapper.input_key = input_key
+    wrapper.output_key = output_key
     return wrapper
 
 
@@ -73,23 +155,37 @@ class Cache:
 
     Methods
     -------
-    __init__():
-        Initializes the Redis client and flushes the database.
+    __init__(flush: bool = False):
+        Initializes the Redis client and optionally flushes the database.
     store(data: Union[str, bytes, int, float]) -> str:
         Stores the given data in Redis with a randomly generated key.
+    store_many(items: Iterable[Union[str, bytes, int, float]]) -> List[str]:
+        Stores several values in Redis in a single round trip.
     get(key: str, fn: Optional[Callable]
     = None) -> Union[str, bytes, int, float, None]:
         Retrieves data from Redis and applies a
         conversion function if provided.
+    get_many(keys: Iterable[str], fn: Optional[Callable]
+    = None) -> List[Union[str, bytes, int, float, None]]:
+        Retrieves several values from Redis with a single MGET.
     get_str(key: str) -> str:
         Retrieves a string from Redis.
     get_int(key: str) -> int:
         Retrieves an integer from Redis.
     """
-    def __init__(self):
-        """Initialize the Redis client and flush the database."""
-        self._redis = redis.Redis()
-        self._redis.flushdb()
+    def __init__(self, flush: bool = False):
+        """
+        Initialize the Redis client and optionally flush the database.
+
+        Parameters
+        ----------
+        flush : bool, default False
+            Whether to empty the database. The flush runs asynchronously
+            so Redis frees the memory without blocking other clients.
+        """
+        self._redis = redis.Redis(connection_pool=_POOL)
+        if flush:
+            self._redis.flushdb(asynchronous=True)
 
     @count_calls
     @call_history
@@ -108,10 +204,42 @@ class Cache:
         str
             The randomly generated key under which the data is stored.
         """
-        key = str(uuid.uuid4())
+        key = os.urandom(16).hex()
         self._redis.set(key, data)
         return key
 
+    def store_many(self, items: Iterable[Union[str, bytes, int, float]]
+                   ) -> List[str]:
+        """
+        Store several values in Redis in a single round trip.
+
+        Each value is recorded exactly as if it had been passed to
+        ``store``: the call count and the input/output history are
+        updated alongside the value itself.
+
+        Parameters
+        ----------
+        items : Iterable[Union[str, bytes, int, float]]
+            The data to store in Redis.
+
+        Returns
+        -------
+        List[str]
+            The randomly generated keys, in the order of ``items``.
+        """
+        store = Cache.store
+        pipe = self._redis.pipeline(transaction=False)
+        keys = []
+        for data in items:
+            key = os.urandom(16).hex()
+            keys.append(key)
+            pipe.set(key, data)
+            pipe.incr(store.count_key)
+            pipe.rpush(store.input_key, _pack((data,)))
+            pipe.rpush(store.output_key, _pack(key))
+        pipe.execute()
+        return keys
+
     def get(self, key: str, fn: Optional[Callable]
             = None) -> Union[str, bytes, int, float, None]:
         """
@@ -137,6 +265,29 @@ class Cache:
             return fn(data)
         return data
 
+    def get_many(self, keys: Iterable[str], fn: Optional[Callable]
+                 = None) -> List[Union[str, bytes, int, float, None]]:
+        """
+        Retrieve several values from Redis with a single MGET.
+
+        Parameters
+        ----------
+        keys : Iterable[str]
+            The keys for the data in Redis.
+        fn : Optional[Callable], default None
+            The function to convert each value back to the desired format.
+
+        Returns
+        -------
+        List[Union[str, bytes, int, float, None]]
+            The retrieved values in the order of ``keys``, with None
+            for every key that does not exist.
+        """
+        values = self._redis.mget(keys)
+        if fn:
+            return [None if data is None else fn(data) for data in values]
+        return values
+
     def get_str(self, key: str) -> str:
         """
         Retrieve a string from Redis.
@@ -166,8 +317,16 @@ class Cache:
         -------
         int
             The retrieved integer data.
+
+        Notes
+        -----
+        ``store`` relies on redis-py writing integers as decimal ASCII,
+        which ``int`` parses directly from the returned bytes.
         """
-        return self.get(key, int)
+        data = self._redis.get(key)
+        if data is None:
+            return None
+        return int(data)
 
 
 def replay(method: Callable):
@@ -179,27 +338,36 @@ def replay(method: Callable):
     method : Callable
         The method to replay the history for.
     """
-    redis_client = redis.Redis()
-    input_key = f"{method.__qualname__}:inputs"
-    output_key = f"{method.__qualname__}:outputs"
-
-    inputs = redis_client.lrange(input_key, 0, -1)
-    outputs = redis_client.lrange(output_key, 0, -1)
+    redis_client = getattr(method, "__self__", None)
+    if isinstance(redis_client, Cache):
+        redis_client = redis_client._redis
+    else:
+        redis_client = redis.Redis(connection_pool=_POOL)
+    input_key = getattr(method, "input_key",
+                        f"{method.__qualname__}:inputs")
+    output_key = getattr(method, "output_key",
+                         f"{method.__qualname__}:outputs")
+
+    # Fetch both histories in a single round trip
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.lrange(input_key, 0, -1)
+    pipe.lrange(output_key, 0, -1)
+    inputs, outputs = pipe.execute()
 
     print(f"{method.__qualname__} was called {len(inputs)} times:")
 
     for input_val, output_val in zip(inputs, outputs):
-        input_val = input_val.decode("utf-8")
-        output_val = output_val.decode("utf-8")
+        input_val = _unpack(input_val)
+        if isinstance(input_val, list):
+            input_val = tuple(input_val)
+        output_val = _unpack(output_val)
         print(f"{method.__qualname__}(*{input_val}) -> {output_val}")
 
 
 if __name__ == "__main__":
-    cache = Cache()
+    cache = Cache(flush=True)
 
     # Test cases for replay
-    cache.store("foo")
-    cache.store("bar")
-    cache.store(42)
+    cache.store_many(["foo", "bar", 42])
 
     replay(cache.store)
@@ -3,34 +3,103 @@
 This module implements a web cache and tracker.
 """
 
+import asyncio
+import time
 import redis
+import redis.asyncio
 import requests
-from typing import Callable
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
-# Initialize the Redis client
-redis_client = redis.Redis()
+if TYPE_CHECKING:
+    import aiohttp
+
+# Initialize the Redis client on a bounded connection pool; callers wait
+# for a free connection once all 64 are in use
+_POOL = redis.BlockingConnectionPool(host="localhost", port=6379,
+                                    max_connections=64, timeout=10)
+redis_client = redis.Redis(connection_pool=_POOL)
+
+# Count the access and read the cached page in a single round trip
+_HIT_SCRIPT = redis_client.register_script(
+    "redis.call('INCR', KEYS[2]); return redis.call('GET', KEYS[1])"
+)
+
+# Reuse HTTP connections across cache misses
+_HTTP = requests.Session()
+_HTTP.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=64))
+_HTTP.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=64))
+
+# How long concurrent misses wait for the caller holding the fetch lock
+_LOCK_WAIT = 10
+_LOCK_POLL = 0.1
+
+
+@lru_cache(maxsize=1024)
+def _keys(url: str) -> Tuple[bytes, bytes, bytes]:
+    """
+    Return the cache, count and fetch lock keys of a URL.
+    """
+    u = url.encode()
+    return b"cache:" + u, b"count:" + u, b"lock:" + u
+
+
+def _wait_for_fill(cache_key: bytes, lock_key: bytes) -> Optional[bytes]:
+    """
+    Wait for the caller holding the fetch lock to fill the cache.
+
+    Returns the cached page, or None once the lock is released or
+    expires without the page being cached.
+    """
+    deadline = time.monotonic() + _LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(_LOCK_POLL)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.get(cache_key)
+        pipe.exists(lock_key)
+        cached_content, locked = pipe.execute()
+        if cached_content or not locked:
+            return cached_content
+    return None
 
 
 def cache_response(method: Callable) -> Callable:
     """
     Decorator to cache the response of the method for 10 seconds.
+
+    Concurrent misses for the same URL are deduplicated: the first caller
+    takes a short-lived lock and fetches the page while the others wait
+    for it to land in the cache, or for the lock to go away.
     """
     def wrapper(url: str) -> str:
-        # Define the cache key and count key
-        cache_key = f"cache:{url}"
-        count_key = f"count:{url}"
-
-        # Increment the count of the URL access
-        redis_client.incr(count_key)
+        # Define the cache key, count key and fetch lock key
+        cache_key, count_key, lock_key = _keys(url)
 
-        # Check if the URL content is cached
-        cached_content = redis_client.get(cache_key)
+        # Increment the count and check if the URL content is cached
+        cached_content = _HIT_SCRIPT(keys=[cache_key, count_key])
         if cached_content:
             return cached_content.decode("utf-8")
 
+        # Wait for another caller that is already fetching the URL
+        lock = redis_client.lock(lock_key, timeout=_LOCK_WAIT)
+        locked = lock.acquire(blocking=False)
+        if not locked:
+            cached_content = _wait_for_fill(cache_key, lock_key)
+            if cached_content:
+                return cached_content.decode("utf-8")
+
         # Fetch the content from the URL
-        response = method(url)
-        redis_client.setex(cache_key, 10, response)
+        try:
+            response = method(url)
+            redis_client.set(cache_key, response, ex=10, nx=True)
+        finally:
+            if locked:
+                try:
+                    lock.release()
+                except redis.exceptions.LockError:
+                    # The lock expired and may belong to another caller
+                    pass
         return response
     return wrapper
 
@@ -50,18 +119,103 @@ def get_page(url: str) -> str:
     str
         The HTML content of the URL.
     """
-    response = requests.get(url)
+    response = _HTTP.get(url, timeout=10)
     return response.text
 
 
+async def _await_fill(r: redis.asyncio.Redis, cache_key: bytes,
+                      lock_key: bytes) -> Optional[bytes]:
+    """
+    Asynchronous counterpart of _wait_for_fill.
+    """
+    deadline = time.monotonic() + _LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_LOCK_POLL)
+        pipe = r.pipeline(transaction=False)
+        pipe.get(cache_key)
+        pipe.exists(lock_key)
+        cached_content, locked = await pipe.execute()
+        if cached_content or not locked:
+            return cached_content
+    return None
+
+
+async def aget_page(session: "aiohttp.ClientSession",
+                    r: redis.asyncio.Redis, url: str) -> str:
+    """
+    Asynchronous counterpart of get_page sharing the same cache keys
+    and fetch lock.
+
+    Parameters
+    ----------
+    session : aiohttp.ClientSession
+        The HTTP session used to fetch the URL on a cache miss.
+    r : redis.asyncio.Redis
+        The Redis client holding the cache and the access count.
+    url : str
+        The URL to fetch.
+
+    Returns
+    -------
+    str
+        The HTML content of the URL.
+    """
+    import aiohttp
+
+    cache_key, count_key, lock_key = _keys(url)
+
+    # Increment the count and check the cache in a single round trip
+    pipe = r.pipeline(transaction=False)
+    pipe.incr(count_key)
+    pipe.get(cache_key)
+    _, cached_content = await pipe.execute()
+    if cached_content:
+        return cached_content.decode("utf-8")
+
+    # Wait for another caller that is already fetching the URL
+    lock = r.lock(lock_key, timeout=_LOCK_WAIT)
+    locked = await lock.acquire(blocking=False)
+    if not locked:
+        cached_content = await _await_fill(r, cache_key, lock_key)
+        if cached_content:
+            return cached_content.decode("utf-8")
+
+    # Fetch the content from the URL
+    try:
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with session.get(url, timeout=timeout) as response:
+            content = await response.text()
+        await r.set(cache_key, content, ex=10, nx=True)
+    finally:
+        if locked:
+            try:
+                await lock.release()
+            except redis.exceptions.LockError:
+                # The lock expired and may belong to another caller
+                pass
+    return content
+
+
+async def _fetch_concurrently(url: str, n: int) -> List[str]:
+    """
+    Fetch url n times concurrently through aget_page.
+    """
+    import aiohttp
+
+    async with aiohttp.ClientSession() as session, \
+            redis.asyncio.Redis() as r:
+        return await asyncio.gather(
+            *[aget_page(session, r, url) for _ in range(n)]
+        )
+
+
 if __name__ == "__main__":
-    # Test the get_page function
+    # Test the get_page function with concurrent requests
     url = "http://slowwly.robertomurray.co.uk"
-    print(get_page(url))
-    print(get_page(url))
-    print(get_page(url))
+    for page in asyncio.run(_fetch_concurrently(url, 3)):
+        print(page)
 
     # Check the count of the URL accesses
-    count_key = f"count:{url}"
+    _, count_key, _ = _keys(url)
     access_count = redis_client.get(count_key)
     print(f"Access count: {access_count.decode('utf-8')}")